@@ -0,0 +1,8 @@
+"""
+Classification analytics module
+"""
+
+from .aggregator import ClassificationAnalytics
+from .sketches import HeavyHitters, QuantileSketch
+
+__all__ = ['ClassificationAnalytics', 'HeavyHitters', 'QuantileSketch']
@@ -0,0 +1,411 @@
+"""
+Streaming Analytics for Classification Outcomes
+Maintains hourly, mergeable aggregates of /classify results so dashboards can
+query rollups without storing or scanning individual events
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from .sketches import HeavyHitters, QuantileSketch
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+GROUP_FIELDS = ('hour', 'region', 'category', 'source')
+OTHER_REGION = 'other'
+
+# (hour, region, category, source)
+CellKey = Tuple[int, str, str, str]
+
+
+class AggregateCell:
+    """Aggregates for one (hour, region, category, source) window"""
+
+    def __init__(self):
+        self.count = 0
+        self.confidence = QuantileSketch()
+        self.waste_types = HeavyHitters()
+
+    def add(self, waste_type: str, confidence: float):
+        # The sketch validates the value, so update it before anything else
+        self.confidence.add(confidence)
+        self.waste_types.add(waste_type)
+        self.count += 1
+
+    def merge(self, other: 'AggregateCell'):
+        self.count += other.count
+        self.confidence.merge(other.confidence)
+        self.waste_types.merge(other.waste_types)
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'confidence': self.confidence.to_dict(),
+            'waste_types': self.waste_types.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'AggregateCell':
+        cell = cls()
+        cell.count = data['count']
+        cell.confidence = QuantileSketch.from_dict(data['confidence'])
+        cell.waste_types = HeavyHitters.from_dict(data['waste_types'])
+        return cell
+
+
+class ClassificationAnalytics:
+    """
+    In-process analytics over classification outcomes
+    Updates touch a single cell under a striped lock. Memory only holds
+    aggregates recorded since the last compaction; compaction merges them
+    into one JSON file per hour, so several processes can share a directory.
+    Hour files older than the retention window are deleted
+    """
+
+    def __init__(self, storage_dir: str = 'data/analytics', compaction_interval: float = 300.0,
+                 num_shards: int = 8, max_regions: int = 64, cache_hours: int = 168,
+                 retention_hours: int = 2160):
+        """
+        Initialize analytics store
+
+        Args:
+            storage_dir: Directory for compacted hourly aggregates
+            compaction_interval: Seconds between background compactions (0 disables)
+            num_shards: Number of independently locked shards
+            max_regions: Distinct regions tracked before new ones are folded into 'other'
+            cache_hours: Hours of parsed hour files kept for queries
+            retention_hours: Hour files older than this are deleted at compaction
+        """
+        self.storage_dir = storage_dir
+        self.num_shards = num_shards
+        self.max_regions = max_regions
+        self.cache_hours = cache_hours
+        self.retention_hours = retention_hours
+        self._shards: List[Dict[CellKey, AggregateCell]] = [{} for _ in range(num_shards)]
+        self._locks = [threading.Lock() for _ in range(num_shards)]
+        self._compaction_lock = threading.Lock()
+        # Guards the query-visible state: drained cells awaiting their write,
+        # the hour files themselves and the parsed-file cache
+        self._view_lock = threading.Lock()
+        self._pending: Dict[CellKey, AggregateCell] = {}
+        self._regions = set()
+        self._cache: Dict[int, Tuple[int, Dict[CellKey, AggregateCell]]] = {}
+        self._stop = threading.Event()
+
+        os.makedirs(storage_dir, exist_ok=True)
+
+        self._worker = None
+        if compaction_interval > 0:
+            self._worker = threading.Thread(
+                target=self._compaction_loop,
+                args=(compaction_interval,),
+                daemon=True
+            )
+            self._worker.start()
+
+        logger.info(f"Classification analytics initialized (storage: {storage_dir})")
+
+    @staticmethod
+    def _hour(timestamp: float) -> int:
+        return int(timestamp // 3600)
+
+    @staticmethod
+    def _hour_label(hour: int) -> str:
+        return datetime.fromtimestamp(hour * 3600, tz=timezone.utc).strftime('%Y-%m-%dT%H:00:00Z')
+
+    def _hour_path(self, hour: int) -> str:
+        return os.path.join(self.storage_dir, f'{hour}.json')
+
+    def _region(self, region) -> str:
+        """Bound region cardinality so arbitrary input cannot grow memory or disk"""
+        region = str(region).replace('|', '/')
+        if region in self._regions:
+            return region
+        if len(self._regions) >= self.max_regions:
+            return OTHER_REGION
+        self._regions.add(region)
+        return region
+
+    def record(self, region: str, category: str, waste_type: str, confidence: float,
+               source: str = 'server', timestamp: Optional[float] = None):
+        """
+        Record one classification outcome
+
+        Args:
+            region: Region the request was made for
+            category: Predicted category (recyclable/organic/hazardous)
+            waste_type: Predicted waste type
+            confidence: Model confidence for the prediction, in [0, 1]
+            source: Where the prediction was made ('server' or 'edge')
+            timestamp: Event time in seconds since epoch (default: now)
+        """
+        confidence = float(confidence)
+        if not math.isfinite(confidence):
+            raise ValueError(f"Confidence must be finite, got {confidence}")
+
+        key = (
+            self._hour(timestamp if timestamp is not None else time.time()),
+            self._region(region),
+            str(category),
+            str(source)
+        )
+        shard = hash(key[1:]) % self.num_shards
+        with self._locks[shard]:
+            cell = self._shards[shard].get(key)
+            if cell is None:
+                cell = self._shards[shard][key] = AggregateCell()
+            cell.add(str(waste_type), confidence)
+
+    def _snapshot(self, hours: Optional[range] = None) -> Dict[CellKey, AggregateCell]:
+        """Merge in-memory shards into one copy of the cells"""
+        merged: Dict[CellKey, AggregateCell] = {}
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                for key, cell in shard.items():
+                    if hours is not None and key[0] not in hours:
+                        continue
+                    target = merged.get(key)
+                    if target is None:
+                        target = merged[key] = AggregateCell()
+                    target.merge(cell)
+        return merged
+
+    def _drain(self) -> Dict[CellKey, AggregateCell]:
+        """Take ownership of everything recorded since the last compaction"""
+        drained: Dict[CellKey, AggregateCell] = {}
+        for i, lock in enumerate(self._locks):
+            with lock:
+                shard, self._shards[i] = self._shards[i], {}
+            for key, cell in shard.items():
+                drained[key] = cell
+        return drained
+
+    def _restore_pending(self, cells: Dict[CellKey, AggregateCell]):
+        """Put drained cells back after a failed write so they are retried"""
+        for key, cell in cells.items():
+            shard = hash(key[1:]) % self.num_shards
+            with self._locks[shard]:
+                target = self._shards[shard].get(key)
+                if target is None:
+                    self._shards[shard][key] = cell
+                else:
+                    target.merge(cell)
+
+    @contextmanager
+    def _file_lock(self):
+        """Serialise read-merge-write of hour files across processes"""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.storage_dir, '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def compact(self):
+        """Merge aggregates recorded since the last compaction into their hour files"""
+        with self._compaction_lock:
+            # Drained cells stay visible to queries as pending until their
+            # hour file has been replaced
+            with self._view_lock:
+                self._pending = self._drain()
+                pending = dict(self._pending)
+            if pending:
+                self._write_pending(pending)
+            self._expire()
+
+    def _write_pending(self, pending: Dict[CellKey, AggregateCell]):
+        by_hour: Dict[int, Dict[CellKey, AggregateCell]] = {}
+        for key, cell in pending.items():
+            by_hour.setdefault(key[0], {})[key] = cell
+
+        try:
+            with self._file_lock():
+                for hour, cells in by_hour.items():
+                    merged = self._read_hour_for_merge(hour)
+                    for key, cell in cells.items():
+                        target = merged.get(key)
+                        if target is None:
+                            target = merged[key] = AggregateCell()
+                        target.merge(cell)
+
+                    path = self._hour_path(hour)
+                    tmp_path = f'{path}.{os.getpid()}.tmp'
+                    with open(tmp_path, 'w') as f:
+                        json.dump({'|'.join(key[1:]): cell.to_dict()
+                                   for key, cell in merged.items()}, f)
+                    with self._view_lock:
+                        os.replace(tmp_path, path)
+                        for key in cells:
+                            self._pending.pop(key, None)
+        finally:
+            # Anything not written goes back to the shards to be retried
+            with self._view_lock:
+                self._restore_pending(self._pending)
+                self._pending = {}
+
+        logger.info(f"Analytics compacted {len(by_hour)} hour(s) to {self.storage_dir}")
+
+    def _read_hour_for_merge(self, hour: int) -> Dict[CellKey, AggregateCell]:
+        """Read an hour file before merging, quarantining it if it cannot be parsed"""
+        path = self._hour_path(hour)
+        try:
+            return self._read_hour(hour)
+        except Exception as e:
+            quarantine = f'{path}.corrupt-{int(time.time())}'
+            logger.error(f"Unreadable analytics file {path} moved to {quarantine}: {e}")
+            os.replace(path, quarantine)
+            return {}
+
+    def _expire(self):
+        """Delete hour files that have fallen out of the retention window"""
+        cutoff = self._hour(time.time()) - self.retention_hours
+        for name in os.listdir(self.storage_dir):
+            stem, ext = os.path.splitext(name)
+            if ext != '.json' or not stem.isdigit() or int(stem) > cutoff:
+                continue
+            try:
+                os.remove(os.path.join(self.storage_dir, name))
+            except FileNotFoundError:
+                pass
+
+    def _compaction_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.compact()
+            except Exception as e:
+                logger.error(f"Analytics compaction error: {e}")
+
+    def _read_hour(self, hour: int) -> Dict[CellKey, AggregateCell]:
+        path = self._hour_path(hour)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            cells = json.load(f)
+        result = {}
+        for name, data in cells.items():
+            region, category, source = name.split('|')
+            result[(hour, region, category, source)] = AggregateCell.from_dict(data)
+        return result
+
+    def _load_hour(self, hour: int) -> Dict[CellKey, AggregateCell]:
+        """Read an hour file for queries, reusing the parsed copy while it is unchanged"""
+        path = self._hour_path(hour)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+
+        cached = self._cache.get(hour)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            cells = self._read_hour(hour)
+        except Exception as e:
+            logger.warning(f"Could not read analytics file {path}: {e}")
+            return {}
+        self._cache[hour] = (mtime, cells)
+        return cells
+
+    def query(self, hours: int = 24, region: Optional[str] = None,
+              category: Optional[str] = None, source: Optional[str] = None,
+              group_by: Optional[List[str]] = None, top_k: int = 5) -> Dict:
+        """
+        Roll up aggregates over a trailing window
+
+        Args:
+            hours: Number of trailing hours to include (current hour counts as one)
+            region: Only include this region
+            category: Only include this category
+            source: Only include this source ('server' or 'edge')
+            group_by: Any of 'hour', 'region', 'category', 'source'; empty for a single total
+            top_k: Number of heavy-hitter waste types per group
+
+        Returns:
+            Dictionary with one entry per group
+        """
+        group_by = group_by or []
+        invalid = [field for field in group_by if field not in GROUP_FIELDS]
+        if invalid:
+            raise ValueError(f"Unsupported group_by fields: {invalid}")
+
+        hours = max(hours, 1)
+        current = self._hour(time.time())
+        window = range(current - hours + 1, current + 1)
+        # Hour files hold everything compacted so far, pending cells are being
+        # written and the shards hold the rest; the view lock keeps the three
+        # consistent with a concurrent compaction
+        with self._view_lock:
+            cells = self._snapshot(window)
+            for cell_map in [self._pending] + [self._load_hour(hour) for hour in window]:
+                for key, cell in cell_map.items():
+                    if key[0] not in window:
+                        continue
+                    target = cells.get(key)
+                    if target is None:
+                        target = cells[key] = AggregateCell()
+                    target.merge(cell)
+
+            cache_floor = current - self.cache_hours
+            for hour in [hour for hour in list(self._cache) if hour <= cache_floor]:
+                self._cache.pop(hour, None)
+
+        groups: Dict[Tuple, AggregateCell] = {}
+        for key, cell in cells.items():
+            fields = dict(zip(GROUP_FIELDS, key))
+            if region and fields['region'] != region:
+                continue
+            if category and fields['category'] != category:
+                continue
+            if source and fields['source'] != source:
+                continue
+            group_key = tuple(fields[field] for field in group_by)
+            target = groups.get(group_key)
+            if target is None:
+                target = groups[group_key] = AggregateCell()
+            target.merge(cell)
+
+        results = []
+        for group_key, cell in sorted(groups.items()):
+            entry = dict(zip(group_by, group_key))
+            if 'hour' in entry:
+                entry['hour'] = self._hour_label(entry['hour'])
+            entry.update({
+                'count': cell.count,
+                'confidence': cell.confidence.summary(),
+                'top_waste_types': cell.waste_types.top(top_k)
+            })
+            results.append(entry)
+
+        return {
+            'window': {
+                'start': self._hour_label(window.start),
+                'end': self._hour_label(current + 1),
+                'hours': hours
+            },
+            'filters': {'region': region, 'category': category, 'source': source},
+            'group_by': group_by,
+            'groups': results
+        }
+
+    def close(self):
+        """Stop background compaction and flush aggregates to disk"""
+        self._stop.set()
+        if self._worker:
+            self._worker.join(timeout=5)
+        self.compact()
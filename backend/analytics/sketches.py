@@ -0,0 +1,160 @@
+"""
+Mergeable sketches for classification analytics
+Fixed-size summaries that update in O(1) and combine across shards and time windows
+"""
+
+import math
+from typing import Dict, List, Tuple
+
+
+class QuantileSketch:
+    """
+    Approximate quantiles for values in a bounded range (e.g. confidence in [0, 1])
+    Values are counted into equal-width bins, so error is at most one bin width
+    """
+
+    def __init__(self, bins: int = 100, low: float = 0.0, high: float = 1.0):
+        """
+        Initialize sketch
+
+        Args:
+            bins: Number of equal-width bins
+            low: Lower bound of the tracked range
+            high: Upper bound of the tracked range
+        """
+        self.bins = bins
+        self.low = low
+        self.high = high
+        self.counts = [0] * bins
+        self.total = 0
+        self.sum = 0.0
+
+    def add(self, value: float):
+        """Record a single value; out-of-range values are clamped, non-finite ones rejected"""
+        if not math.isfinite(value):
+            raise ValueError(f"Cannot add non-finite value {value} to sketch")
+        value = min(max(value, self.low), self.high)
+        span = self.high - self.low
+        idx = int((value - self.low) / span * self.bins)
+        idx = min(max(idx, 0), self.bins - 1)
+        self.counts[idx] += 1
+        self.total += 1
+        self.sum += value
+
+    def merge(self, other: 'QuantileSketch'):
+        """Fold another sketch with the same binning into this one"""
+        if (other.bins, other.low, other.high) != (self.bins, self.low, self.high):
+            raise ValueError("Cannot merge sketches with different binning")
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.total += other.total
+        self.sum += other.sum
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-th quantile (0 <= q <= 1) by interpolating within a bin"""
+        if not self.total:
+            return 0.0
+        width = (self.high - self.low) / self.bins
+        target = q * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= target:
+                fraction = (target - seen) / count
+                return self.low + (i + fraction) * width
+            seen += count
+        return self.high
+
+    def mean(self) -> float:
+        return self.sum / self.total if self.total else 0.0
+
+    def summary(self, quantiles: Tuple[float, ...] = (0.5, 0.9, 0.99)) -> Dict:
+        """Compact description suitable for API responses"""
+        return {
+            'count': self.total,
+            'mean': round(self.mean(), 4),
+            'quantiles': {f'p{int(q * 100)}': round(self.quantile(q), 4) for q in quantiles}
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            'bins': self.bins,
+            'low': self.low,
+            'high': self.high,
+            'counts': self.counts,
+            'total': self.total,
+            'sum': self.sum
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'QuantileSketch':
+        sketch = cls(data['bins'], data['low'], data['high'])
+        sketch.counts = list(data['counts'])
+        sketch.total = data['total']
+        sketch.sum = data['sum']
+        return sketch
+
+
+class HeavyHitters:
+    """
+    Space-Saving heavy-hitter sketch
+    Tracks at most `capacity` items; counts of reported items are over-estimated by at most `error`
+    """
+
+    def __init__(self, capacity: int = 20):
+        """
+        Initialize sketch
+
+        Args:
+            capacity: Maximum number of distinct items tracked
+        """
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    def add(self, item: str, count: int = 1):
+        """Record occurrences of an item"""
+        if item in self.counts:
+            self.counts[item] += count
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+            return
+        # Replace the current minimum; capacity is small so the scan is bounded
+        victim = min(self.counts, key=self.counts.get)
+        floor = self.counts.pop(victim)
+        self.errors.pop(victim)
+        self.counts[item] = floor + count
+        self.errors[item] = floor
+
+    def merge(self, other: 'HeavyHitters'):
+        """Fold another sketch into this one, keeping the largest counts"""
+        for item, count in other.counts.items():
+            self.counts[item] = self.counts.get(item, 0) + count
+            self.errors[item] = self.errors.get(item, 0) + other.errors.get(item, 0)
+        if len(self.counts) > self.capacity:
+            keep = sorted(self.counts, key=self.counts.get, reverse=True)[:self.capacity]
+            self.counts = {item: self.counts[item] for item in keep}
+            self.errors = {item: self.errors[item] for item in keep}
+
+    def top(self, k: int = 5) -> List[Dict]:
+        """Return the k most frequent items with their estimated counts"""
+        items = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:k]
+        return [
+            {'item': item, 'count': count, 'max_error': self.errors[item]}
+            for item, count in items
+        ]
+
+    def to_dict(self) -> Dict:
+        return {
+            'capacity': self.capacity,
+            'counts': self.counts,
+            'errors': self.errors
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'HeavyHitters':
+        sketch = cls(data['capacity'])
+        sketch.counts = dict(data['counts'])
+        sketch.errors = dict(data['errors'])
+        return sketch
@@ -9,10 +9,13 @@ import base64
 import io
 from PIL import Image
 import numpy as np
-from waste_classifier import WasteClassifier
+from waste_classifier import CATEGORY_MAPPING, MODEL_VERSION, WasteClassifier
 from rag_system.waste_rag import WasteRAG
+from analytics import ClassificationAnalytics
 import logging
 import os
+import math
+import atexit
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -27,10 +30,11 @@ logger = logging.getLogger(__name__)
 # Initialize the waste classifier and RAG system
 classifier = None
 rag_system = None
+analytics = None
 
 try:
     logger.info("Initializing Waste Classifier...")
-    classifier = WasteClassifier()
+    classifier = WasteClassifier(model_name=os.getenv('MODEL_NAME', 'resnet50'))
     logger.info("Waste Classifier initialized successfully")
 except Exception as e:
     logger.error(f"Error initializing Waste Classifier: {e}")
@@ -46,6 +50,20 @@ except Exception as e:
     import traceback
     traceback.print_exc()
 
+try:
+    logger.info("Initializing Analytics...")
+    analytics = ClassificationAnalytics(
+        storage_dir=os.getenv('ANALYTICS_DIR', 'data/analytics'),
+        compaction_interval=float(os.getenv('ANALYTICS_COMPACTION_INTERVAL', 300)),
+        max_regions=int(os.getenv('ANALYTICS_MAX_REGIONS', 64)),
+        retention_hours=int(os.getenv('ANALYTICS_RETENTION_HOURS', 2160))
+    )
+    # Flush aggregates recorded since the last compaction on normal shutdown
+    atexit.register(analytics.close)
+    logger.info("Analytics initialized successfully")
+except Exception as e:
+    logger.error(f"Error initializing Analytics: {e}")
+
 
 @app.route('/health', methods=['GET'])
 def health():
@@ -57,6 +75,55 @@ def health():
     }), 200
 
 
+def _analytics_region(region):
+    """Map a client-supplied region onto a known regulations region or 'other'"""
+    known = rag_system.regulations_db if rag_system else {'general': None}
+    region = str(region)
+    if region in known:
+        return region
+    matches = [name for name in known if name.lower() == region.lower()]
+    return matches[0] if matches else 'other'
+
+
+def _with_guidance(classification_result, region):
+    """Record the outcome and attach RAG disposal guidance and regulations"""
+    # Get disposal guide using RAG
+    disposal_guide = rag_system.get_disposal_guide(
+        waste_type=classification_result['waste_type'],
+        category=classification_result['classification']
+    )
+    
+    # Get local regulations
+    regulations = rag_system.get_regulations(
+        waste_type=classification_result['waste_type'],
+        region=region
+    )
+    
+    # Only count requests that produced a full response; analytics must
+    # never fail a classification that already succeeded
+    if analytics:
+        try:
+            analytics.record(
+                region=_analytics_region(region),
+                category=classification_result['classification'],
+                waste_type=classification_result['waste_type'],
+                confidence=classification_result['confidence'],
+                source=classification_result.get('source', 'server')
+            )
+        except Exception as e:
+            logger.warning(f"Analytics record error: {e}")
+    
+    return {
+        **classification_result,
+        'disposal_guide': disposal_guide,
+        'regulations': regulations,
+        'sdg_impact': {
+            'SDG_11': 'Sustainable Cities and Communities',
+            'SDG_12': 'Responsible Consumption and Production'
+        }
+    }
+
+
 @app.route('/classify', methods=['POST'])
 def classify_waste():
     """
@@ -104,27 +171,7 @@ def classify_waste():
         # Classify the waste
         classification_result = classifier.classify(image)
         
-        # Get disposal guide using RAG
-        disposal_guide = rag_system.get_disposal_guide(
-            waste_type=classification_result['waste_type'],
-            category=classification_result['classification']
-        )
-        
-        # Get local regulations
-        regulations = rag_system.get_regulations(
-            waste_type=classification_result['waste_type'],
-            region=data.get('region', 'general')
-        )
-        
-        response = {
-            **classification_result,
-            'disposal_guide': disposal_guide,
-            'regulations': regulations,
-            'sdg_impact': {
-                'SDG_11': 'Sustainable Cities and Communities',
-                'SDG_12': 'Responsible Consumption and Production'
-            }
-        }
+        response = _with_guidance(classification_result, data.get('region', 'general'))
         
         return jsonify(response), 200
     
@@ -135,6 +182,75 @@ def classify_waste():
         }), 500
 
 
+@app.route('/classify/label', methods=['POST'])
+def label_waste():
+    """
+    Return guidance for a prediction made on-device with the edge bundle
+    
+    Expects:
+    {
+        "waste_type": "plastic",
+        "confidence": 0.93,
+        "region": "USA",
+        "model_version": "1.0.0"
+    }
+    
+    confidence is required and must be in [0, 1]
+    
+    Returns the same payload as /classify, without top_predictions
+    """
+    try:
+        # Only guidance is needed here, so the PyTorch model is not required
+        if not rag_system:
+            return jsonify({
+                'error': 'RAG system not initialized'
+            }), 500
+        
+        data = request.json
+        if not isinstance(data, dict) or 'waste_type' not in data:
+            return jsonify({
+                'error': 'No waste_type provided'
+            }), 400
+        
+        waste_type = data['waste_type']
+        if not isinstance(waste_type, str) or waste_type not in CATEGORY_MAPPING:
+            return jsonify({
+                'error': f'Unknown waste_type: {waste_type}'
+            }), 400
+        
+        confidence = data.get('confidence')
+        if (isinstance(confidence, bool) or not isinstance(confidence, (int, float))
+                or not math.isfinite(confidence) or not 0.0 <= confidence <= 1.0):
+            return jsonify({
+                'error': 'confidence must be a number between 0 and 1'
+            }), 400
+        
+        region = data.get('region', 'general')
+        model_version = data.get('model_version', MODEL_VERSION)
+        for field, value in (('region', region), ('model_version', model_version)):
+            if not isinstance(value, str):
+                return jsonify({
+                    'error': f'{field} must be a string'
+                }), 400
+        
+        classification_result = {
+            'classification': CATEGORY_MAPPING[waste_type],
+            'waste_type': waste_type,
+            'confidence': float(confidence),
+            'model_version': model_version,
+            'source': 'edge'
+        }
+        response = _with_guidance(classification_result, region)
+        
+        return jsonify(response), 200
+    
+    except Exception as e:
+        logger.error(f"Label lookup error: {e}")
+        return jsonify({
+            'error': f'Label lookup failed: {str(e)}'
+        }), 500
+
+
 @app.route('/regulations', methods=['GET'])
 def get_regulations():
     """
@@ -208,6 +324,58 @@ def get_tips():
         }), 500
 
 
+@app.route('/analytics', methods=['GET'])
+def get_analytics():
+    """
+    Get aggregated classification statistics
+    
+    Query params:
+    - hours: trailing window in hours (default: 24)
+    - region: filter by region (optional)
+    - category: filter by category (optional)
+    - source: filter by source, 'server' or 'edge' (optional)
+    - group_by: comma-separated subset of hour,region,category,source (optional)
+    """
+    try:
+        if not analytics:
+            return jsonify({
+                'error': 'Analytics not initialized'
+            }), 500
+        
+        try:
+            hours = int(request.args.get('hours', 24))
+        except ValueError:
+            hours = 0
+        if not 1 <= hours <= 8760:
+            return jsonify({
+                'error': 'hours must be an integer between 1 and 8760'
+            }), 400
+        
+        group_by = request.args.get('group_by', '')
+        group_by = [field.strip() for field in group_by.split(',') if field.strip()]
+        
+        try:
+            result = analytics.query(
+                hours=hours,
+                region=request.args.get('region', None),
+                category=request.args.get('category', None),
+                source=request.args.get('source', None),
+                group_by=group_by
+            )
+        except ValueError as e:
+            return jsonify({
+                'error': str(e)
+            }), 400
+        
+        return jsonify(result), 200
+    
+    except Exception as e:
+        logger.error(f"Analytics query error: {e}")
+        return jsonify({
+            'error': 'Failed to retrieve analytics'
+        }), 500
+
+
 @app.route('/feedback', methods=['POST'])
 def submit_feedback():
     """
@@ -0,0 +1,7 @@
+"""
+Edge inference export module
+"""
+
+from .export import EdgeExporter, preprocess, preprocessing_constants
+
+__all__ = ['EdgeExporter', 'preprocess', 'preprocessing_constants']
@@ -0,0 +1,354 @@
+"""
+Edge Inference Bundle Export
+Exports WasteClassifier to a quantised ONNX model plus a versioned manifest
+so browser or kiosk clients can classify on-device and call /classify/label
+
+Usage (from the backend directory):
+    python -m edge.export --model resnet50 --samples data/samples
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+import torchvision.transforms as transforms
+from PIL import Image
+
+from waste_classifier import MODEL_VERSION, WasteClassifier
+
+try:
+    import onnxruntime as ort
+    from onnxruntime.quantization import (
+        CalibrationDataReader,
+        QuantFormat,
+        QuantType,
+        quantize_dynamic,
+        quantize_static
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+except ImportError:
+    ort = None
+    CalibrationDataReader = object
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+OPSET_VERSION = 17
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+
+def _require_onnxruntime():
+    if ort is None:
+        raise ImportError("Edge export requires onnx and onnxruntime: pip install -r requirements-export.txt")
+
+
+def preprocessing_constants(classifier: WasteClassifier) -> Dict:
+    """Read preprocessing parameters straight from WasteClassifier.transform"""
+    constants = {
+        'color_space': 'RGB',
+        'layout': 'NCHW',
+        'scale': 1 / 255.0
+    }
+    for step in classifier.transform.transforms:
+        if isinstance(step, transforms.Resize):
+            size = step.size if isinstance(step.size, (list, tuple)) else (step.size, step.size)
+            constants['resize'] = {
+                'height': size[0],
+                'width': size[1],
+                'interpolation': step.interpolation.value,
+                # The server resizes PIL images, which always antialias when
+                # downscaling; antialias=None only means 'backend default'
+                'antialias': True if step.antialias is None else bool(step.antialias)
+            }
+        elif isinstance(step, transforms.Normalize):
+            constants['mean'] = list(step.mean)
+            constants['std'] = list(step.std)
+    return constants
+
+
+def preprocess(image: Image.Image, constants: Dict) -> np.ndarray:
+    """
+    Reference client-side preprocessing driven only by the manifest
+
+    Args:
+        image: PIL Image object
+        constants: 'preprocessing' section of the manifest
+
+    Returns:
+        Float32 array of shape (1, 3, H, W)
+    """
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    resize = constants['resize']
+    image = image.resize((resize['width'], resize['height']), Image.BILINEAR)
+    array = np.asarray(image, dtype=np.float32) * constants['scale']
+    array = (array - np.array(constants['mean'], dtype=np.float32)) / np.array(constants['std'], dtype=np.float32)
+    return array.transpose(2, 0, 1)[np.newaxis].astype(np.float32)
+
+
+def _sample_paths(sample_dir: str, limit: int) -> List[str]:
+    paths = []
+    for root, _, files in os.walk(sample_dir):
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)[:limit]
+
+
+def _load_image(path: str) -> Image.Image:
+    with Image.open(path) as image:
+        return image.convert('RGB')
+
+
+class _SampleReader(CalibrationDataReader):
+    """Feeds preprocessed sample images to static quantization calibration"""
+
+    def __init__(self, paths: List[str], constants: Dict, input_name: str):
+        self._inputs = iter(
+            {input_name: preprocess(_load_image(path), constants)} for path in paths
+        )
+
+    def get_next(self) -> Optional[Dict]:
+        return next(self._inputs, None)
+
+
+class EdgeExporter:
+    """Builds the on-device bundle: ONNX model, quantised model and manifest"""
+
+    def __init__(self, model_name: str = 'resnet50', output_dir: str = 'models/edge'):
+        """
+        Initialize exporter
+
+        Args:
+            model_name: WasteClassifier architecture to export
+            output_dir: Root directory for exported bundles
+        """
+        _require_onnxruntime()
+        self.classifier = WasteClassifier(model_name=model_name)
+        self.model_name = model_name
+        self.output_dir = os.path.join(output_dir, model_name)
+        self.preprocessing = preprocessing_constants(self.classifier)
+        self.quantization = None
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    @property
+    def fp32_path(self) -> str:
+        return os.path.join(self.output_dir, f'{self.model_name}_waste_classifier.onnx')
+
+    @property
+    def quantized_path(self) -> str:
+        return os.path.join(self.output_dir, f'{self.model_name}_waste_classifier.int8.onnx')
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.output_dir, 'manifest.json')
+
+    def export_onnx(self) -> str:
+        """Export the float32 model with a dynamic batch dimension"""
+        resize = self.preprocessing['resize']
+        dummy = torch.randn(1, 3, resize['height'], resize['width'], device=self.classifier.device)
+        self.classifier.model.eval()
+        torch.onnx.export(
+            self.classifier.model,
+            dummy,
+            self.fp32_path,
+            input_names=['input'],
+            output_names=['logits'],
+            dynamic_axes={'input': {0: 'batch'}, 'logits': {0: 'batch'}},
+            opset_version=OPSET_VERSION,
+            do_constant_folding=True,
+            dynamo=False
+        )
+        logger.info(f"Exported ONNX model to {self.fp32_path}")
+        return self.fp32_path
+
+    def quantize(self, calibration_paths: Optional[List[str]] = None) -> str:
+        """
+        Quantise the exported model to int8
+
+        Static QDQ quantisation is used when calibration images are available,
+        since it covers convolutions and runs on onnxruntime-web; otherwise
+        weights are quantised dynamically
+        """
+        prepared_path = os.path.join(self.output_dir, 'prepared.onnx')
+        quant_pre_process(self.fp32_path, prepared_path)
+
+        try:
+            if calibration_paths:
+                quantize_static(
+                    prepared_path,
+                    self.quantized_path,
+                    _SampleReader(calibration_paths, self.preprocessing, 'input'),
+                    quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8,
+                    weight_type=QuantType.QInt8,
+                    per_channel=True
+                )
+                method = 'static'
+            else:
+                quantize_dynamic(prepared_path, self.quantized_path, weight_type=QuantType.QUInt8)
+                method = 'dynamic'
+        finally:
+            os.remove(prepared_path)
+
+        self.quantization = method
+        logger.info(f"Quantised ({method}) model written to {self.quantized_path}")
+        return self.quantized_path
+
+    def write_manifest(self) -> Dict:
+        """Write the versioned manifest clients use to run and label predictions"""
+        with open(self.quantized_path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+
+        manifest = {
+            'manifest_version': MANIFEST_VERSION,
+            'model_name': self.model_name,
+            'model_version': MODEL_VERSION,
+            'model_file': os.path.basename(self.quantized_path),
+            'model_sha256': digest,
+            'model_size_bytes': os.path.getsize(self.quantized_path),
+            'opset': OPSET_VERSION,
+            'quantization': self.quantization,
+            'input_name': 'input',
+            'output_name': 'logits',
+            'output_activation': 'softmax',
+            'class_names': self.classifier.class_names,
+            'category_mapping': self.classifier.category_mapping,
+            'preprocessing': self.preprocessing,
+            'exported_at': datetime.now(timezone.utc).isoformat()
+        }
+        with open(self.manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        logger.info(f"Manifest written to {self.manifest_path}")
+        return manifest
+
+    def check_parity(self, sample_paths: List[str], tolerance: float = 0.1,
+                     min_agreement: float = 0.95, model_path: Optional[str] = None) -> Dict:
+        """
+        Compare exported-model predictions with the server on a sample set
+
+        The exported model is fed through manifest-driven preprocessing, exactly
+        as a client would, while the server path uses WasteClassifier.classify
+
+        Args:
+            sample_paths: Images to compare on
+            tolerance: Maximum allowed absolute difference in top-1 confidence
+            min_agreement: Minimum fraction of samples with the same top-1 class
+            model_path: ONNX model to check (default: the quantised model)
+
+        Returns:
+            Parity report with a 'passed' flag
+        """
+        model_path = model_path or self.quantized_path
+        session = ort.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+        agree = 0
+        max_diff = 0.0
+        mismatches = []
+
+        for path in sample_paths:
+            image = _load_image(path)
+            server = self.classifier.classify(image)
+
+            logits = session.run(None, {'input': preprocess(image, self.preprocessing)})[0][0]
+            probs = np.exp(logits - logits.max())
+            probs /= probs.sum()
+            edge_type = self.classifier.class_names[int(probs.argmax())]
+            server_idx = self.classifier.class_names.index(server['waste_type'])
+
+            if edge_type == server['waste_type']:
+                agree += 1
+            else:
+                mismatches.append({'path': path, 'server': server['waste_type'], 'edge': edge_type})
+            max_diff = max(max_diff, abs(float(probs[server_idx]) - server['confidence']))
+
+        total = len(sample_paths)
+        agreement = agree / total if total else 0.0
+        report = {
+            'model_file': os.path.basename(model_path),
+            'samples': total,
+            'top1_agreement': agreement,
+            'max_confidence_diff': max_diff,
+            'tolerance': tolerance,
+            'min_agreement': min_agreement,
+            'mismatches': mismatches,
+            'passed': total > 0 and agreement >= min_agreement and max_diff <= tolerance
+        }
+        logger.info(f"Parity: {agree}/{total} agree, max confidence diff {max_diff:.4f}")
+        return report
+
+    def export(self, sample_dir: str, max_samples: int = 100, tolerance: float = 0.1,
+               min_agreement: float = 0.95, calibration_fraction: float = 0.5) -> Dict:
+        """
+        Run the full pipeline: export, quantise, manifest and parity check
+
+        Sample images are split so that parity is measured on images the
+        quantiser never saw during calibration
+
+        Args:
+            sample_dir: Folder of images used for calibration and parity
+            max_samples: Maximum number of sample images used
+            tolerance: Parity confidence tolerance
+            min_agreement: Parity top-1 agreement threshold
+            calibration_fraction: Share of samples used for calibration
+
+        Returns:
+            Dictionary with manifest and parity report
+        """
+        samples = _sample_paths(sample_dir, max_samples)
+        if len(samples) < 2:
+            raise ValueError(f"Need at least 2 sample images under {sample_dir}, found {len(samples)}")
+
+        random.Random(0).shuffle(samples)
+        split = min(max(int(len(samples) * calibration_fraction), 1), len(samples) - 1)
+        calibration, held_out = samples[:split], samples[split:]
+
+        self.export_onnx()
+        self.quantize(calibration)
+        manifest = self.write_manifest()
+        parity = self.check_parity(held_out, tolerance=tolerance, min_agreement=min_agreement)
+        parity['calibration_samples'] = len(calibration)
+
+        with open(os.path.join(self.output_dir, 'parity_report.json'), 'w') as f:
+            json.dump(parity, f, indent=2)
+
+        return {'manifest': manifest, 'parity': parity}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export an on-device waste classification bundle')
+    parser.add_argument('--model', default='resnet50', help='resnet50, mobilenet or compact')
+    parser.add_argument('--samples', required=True, help='Folder of images for calibration and parity')
+    parser.add_argument('--output-dir', default='models/edge')
+    parser.add_argument('--max-samples', type=int, default=100)
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    parser.add_argument('--min-agreement', type=float, default=0.95)
+    parser.add_argument('--calibration-fraction', type=float, default=0.5)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    exporter = EdgeExporter(model_name=args.model, output_dir=args.output_dir)
+    result = exporter.export(
+        args.samples,
+        max_samples=args.max_samples,
+        tolerance=args.tolerance,
+        min_agreement=args.min_agreement,
+        calibration_fraction=args.calibration_fraction
+    )
+    print(json.dumps(result['parity'], indent=2))
+
+    if not result['parity']['passed']:
+        logger.error("Exported model does not match server predictions within tolerance")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
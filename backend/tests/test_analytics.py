@@ -0,0 +1,222 @@
+"""
+Tests for classification analytics: sketches, compaction and rollup queries
+"""
+
+import json
+import math
+import os
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from analytics import ClassificationAnalytics, HeavyHitters, QuantileSketch
+
+
+def test_quantile_sketch_quantiles_within_one_bin():
+    sketch = QuantileSketch()
+    for i in range(1000):
+        sketch.add(i / 1000)
+
+    assert sketch.total == 1000
+    assert sketch.mean() == pytest.approx(0.4995)
+    assert sketch.quantile(0.5) == pytest.approx(0.5, abs=0.01)
+    assert sketch.quantile(0.9) == pytest.approx(0.9, abs=0.01)
+
+
+def test_quantile_sketch_merge_and_round_trip():
+    left, right = QuantileSketch(), QuantileSketch()
+    for value in (0.1, 0.2, 0.3):
+        left.add(value)
+    for value in (0.7, 0.8):
+        right.add(value)
+
+    left.merge(right)
+    restored = QuantileSketch.from_dict(json.loads(json.dumps(left.to_dict())))
+
+    assert restored.total == 5
+    assert restored.counts == left.counts
+    assert restored.mean() == pytest.approx(0.42)
+
+
+def test_quantile_sketch_rejects_non_finite_and_clamps():
+    sketch = QuantileSketch()
+    with pytest.raises(ValueError):
+        sketch.add(math.nan)
+    with pytest.raises(ValueError):
+        sketch.add(math.inf)
+    assert sketch.total == 0
+
+    sketch.add(1.7)
+    sketch.add(-3.0)
+    assert sketch.total == 2
+    assert sketch.mean() == pytest.approx(0.5)
+
+
+def test_quantile_sketch_merge_requires_same_binning():
+    with pytest.raises(ValueError):
+        QuantileSketch(bins=10).merge(QuantileSketch(bins=20))
+
+
+def test_heavy_hitters_keeps_frequent_items_within_capacity():
+    sketch = HeavyHitters(capacity=3)
+    for item, count in (('plastic', 50), ('paper', 30), ('glass', 20)):
+        sketch.add(item, count)
+    for i in range(10):
+        sketch.add(f'rare_{i}')
+
+    top = sketch.top(2)
+    assert len(sketch.counts) == 3
+    assert [entry['item'] for entry in top] == ['plastic', 'paper']
+    assert top[0]['count'] == 50
+
+
+def test_heavy_hitters_merge_and_round_trip():
+    left, right = HeavyHitters(capacity=2), HeavyHitters(capacity=2)
+    left.add('plastic', 5)
+    left.add('paper', 1)
+    right.add('plastic', 2)
+    right.add('glass', 4)
+
+    left.merge(right)
+    restored = HeavyHitters.from_dict(json.loads(json.dumps(left.to_dict())))
+
+    assert restored.counts == {'plastic': 7, 'glass': 4}
+    assert restored.top(1)[0]['item'] == 'plastic'
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return str(tmp_path / 'analytics')
+
+
+def _analytics(storage, **kwargs):
+    return ClassificationAnalytics(storage, compaction_interval=0, **kwargs)
+
+
+def _total(result):
+    return sum(group['count'] for group in result['groups'])
+
+
+def test_record_compact_query_round_trip(storage):
+    analytics = _analytics(storage)
+    for i in range(10):
+        analytics.record('USA', 'recyclable', 'plastic', 0.9)
+    analytics.record('EU', 'organic', 'organic', 0.6, source='edge')
+
+    before = analytics.query(group_by=['region', 'source'])
+    analytics.compact()
+    after = analytics.query(group_by=['region', 'source'])
+
+    assert before['groups'] == after['groups']
+    assert [(g['region'], g['source'], g['count']) for g in after['groups']] == [
+        ('EU', 'edge', 1),
+        ('USA', 'server', 10)
+    ]
+    assert after['groups'][1]['top_waste_types'][0]['item'] == 'plastic'
+    assert analytics.query(source='edge')['groups'][0]['count'] == 1
+
+
+def test_instances_sharing_directory_merge_into_same_hour_file(storage):
+    first, second = _analytics(storage), _analytics(storage)
+    first.record('USA', 'recyclable', 'plastic', 0.9)
+    second.record('USA', 'recyclable', 'paper', 0.8)
+    second.record('EU', 'hazardous', 'hazardous', 0.7)
+
+    first.compact()
+    second.compact()
+    # A compaction with nothing new must not overwrite the other writer
+    _analytics(storage).compact()
+
+    hour_files = [name for name in os.listdir(storage) if name.endswith('.json')]
+    assert len(hour_files) == 1
+    result = _analytics(storage).query(group_by=['region'])
+    assert [(g['region'], g['count']) for g in result['groups']] == [('EU', 1), ('USA', 2)]
+
+
+def test_events_stay_visible_while_compaction_writes(storage, monkeypatch):
+    analytics = _analytics(storage)
+    for _ in range(100):
+        analytics.record('USA', 'recyclable', 'plastic', 0.9)
+
+    seen = []
+    original_lock = analytics._file_lock
+
+    @contextmanager
+    def observing_lock():
+        seen.append(_total(analytics.query()))
+        with original_lock():
+            yield
+
+    monkeypatch.setattr(analytics, '_file_lock', observing_lock)
+    analytics.compact()
+
+    assert seen == [100]
+    assert _total(analytics.query()) == 100
+
+
+def test_failed_write_keeps_events_for_retry(storage, monkeypatch):
+    analytics = _analytics(storage)
+    analytics.record('USA', 'recyclable', 'plastic', 0.9)
+
+    def failing_dump(*args, **kwargs):
+        raise OSError('disk full')
+
+    monkeypatch.setattr('analytics.aggregator.json.dump', failing_dump)
+    with pytest.raises(OSError):
+        analytics.compact()
+    assert _total(analytics.query()) == 1
+
+    monkeypatch.undo()
+    analytics.compact()
+    assert _total(_analytics(storage).query()) == 1
+
+
+def test_nan_confidence_rejected_without_touching_cells(storage):
+    analytics = _analytics(storage)
+    analytics.record('USA', 'recyclable', 'plastic', 0.9)
+    with pytest.raises(ValueError):
+        analytics.record('USA', 'recyclable', 'plastic', math.nan)
+
+    group = analytics.query()['groups'][0]
+    assert group['count'] == 1
+    assert group['confidence']['count'] == 1
+
+
+def test_group_by_validation(storage):
+    with pytest.raises(ValueError):
+        _analytics(storage).query(group_by=['region', 'waste_type'])
+
+
+def test_region_cardinality_is_capped(storage):
+    analytics = _analytics(storage, max_regions=2)
+    for region in ('a', 'b', 'c', 'd', ['x'], 5):
+        analytics.record(region, 'organic', 'organic', 0.5)
+
+    regions = {g['region']: g['count'] for g in analytics.query(group_by=['region'])['groups']}
+    assert regions == {'a': 1, 'b': 1, 'other': 4}
+
+
+def test_malformed_hour_file_is_quarantined(storage):
+    analytics = _analytics(storage)
+    hour = int(time.time() // 3600)
+    with open(os.path.join(storage, f'{hour}.json'), 'w') as f:
+        f.write('{not json')
+
+    analytics.record('USA', 'recyclable', 'plastic', 0.9)
+    analytics.compact()
+
+    names = os.listdir(storage)
+    assert any(name.startswith(f'{hour}.json.corrupt-') for name in names)
+    assert _total(_analytics(storage).query()) == 1
+
+
+def test_hour_files_past_retention_are_deleted(storage):
+    analytics = _analytics(storage, retention_hours=24)
+    now = time.time()
+    analytics.record('USA', 'recyclable', 'plastic', 0.9, timestamp=now - 48 * 3600)
+    analytics.record('USA', 'recyclable', 'plastic', 0.9, timestamp=now)
+    analytics.compact()
+
+    hour_files = [name for name in os.listdir(storage) if name.endswith('.json')]
+    assert hour_files == [f'{int(now // 3600)}.json']
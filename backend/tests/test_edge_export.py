@@ -0,0 +1,117 @@
+"""
+Parity tests for the edge inference bundle
+Exports the compact model (no pretrained download needed) and checks the
+ONNX predictions against WasteClassifier.classify on synthetic images.
+The model is untrained, so these guard the export path itself; parity of
+the trained model is enforced by the exit code of python -m edge.export
+"""
+
+import json
+import os
+
+import pytest
+
+torch = pytest.importorskip('torch')
+pytest.importorskip('onnx')
+pytest.importorskip('onnxruntime')
+np = pytest.importorskip('numpy')
+from PIL import Image
+
+from edge.export import EdgeExporter
+from waste_classifier import CATEGORY_MAPPING, CLASS_NAMES
+
+SAMPLE_COUNT = 40
+# Quantised parity is only asserted where the server's top-1 probability
+# beats the runner-up by this much; near-ties legitimately flip under int8
+MIN_SERVER_MARGIN = 0.2
+
+
+def _write_samples(directory, count=SAMPLE_COUNT):
+    """Write deterministic gradient-plus-noise images with varied colours"""
+    rng = np.random.default_rng(0)
+    directory.mkdir()
+    ramp = np.linspace(0, 1, 96)[None, :, None]
+    for i in range(count):
+        base = rng.uniform(0, 255, size=(1, 1, 3))
+        noise = rng.normal(0, 20, size=(96, 96, 3))
+        pixels = np.clip(base * ramp + noise + 30 * (i % 4), 0, 255).astype(np.uint8)
+        Image.fromarray(pixels).save(directory / f'sample_{i:02d}.png')
+    return directory
+
+
+@pytest.fixture
+def exporter(tmp_path, monkeypatch):
+    # Run in an empty directory so no trained weights are picked up
+    monkeypatch.chdir(tmp_path)
+    torch.manual_seed(0)
+    exporter = EdgeExporter(model_name='compact', output_dir=str(tmp_path / 'edge'))
+    # A randomly initialised head gives near-uniform outputs; widen the
+    # logit margins so top-1 comparisons are meaningful
+    with torch.no_grad():
+        exporter.classifier.model.classifier[1].weight.mul_(10.0)
+    return exporter
+
+
+@pytest.fixture
+def samples(tmp_path):
+    return _write_samples(tmp_path / 'samples')
+
+
+def test_fp32_export_matches_server(exporter, samples):
+    exporter.export_onnx()
+    paths = sorted(str(path) for path in samples.iterdir())
+
+    report = exporter.check_parity(paths, tolerance=1e-3, min_agreement=1.0, model_path=exporter.fp32_path)
+
+    assert report['top1_agreement'] == 1.0
+    assert report['max_confidence_diff'] <= 1e-3
+    assert report['passed']
+
+
+def _server_margin(exporter, path):
+    with Image.open(path) as image:
+        predictions = exporter.classifier.classify(image.convert('RGB'))['top_predictions']
+    return predictions[0]['confidence'] - predictions[1]['confidence']
+
+
+def test_quantized_export_matches_server_on_held_out(exporter, samples):
+    paths = sorted(str(path) for path in samples.iterdir())
+    calibration, held_out = paths[::2], paths[1::2]
+
+    exporter.export_onnx()
+    exporter.quantize(calibration)
+    decisive = [path for path in held_out if _server_margin(exporter, path) >= MIN_SERVER_MARGIN]
+    assert len(decisive) >= len(held_out) // 2, 'synthetic samples too ambiguous to test parity'
+
+    report = exporter.check_parity(decisive, tolerance=0.15, min_agreement=1.0)
+
+    assert report['top1_agreement'] == 1.0
+    assert report['max_confidence_diff'] <= 0.15
+    assert report['passed']
+
+
+def test_export_holds_out_parity_samples(exporter, samples):
+    parity = exporter.export(str(samples), tolerance=1.0, min_agreement=0.0)['parity']
+
+    assert parity['calibration_samples'] == SAMPLE_COUNT // 2
+    assert parity['samples'] == SAMPLE_COUNT - SAMPLE_COUNT // 2
+    assert os.path.exists(exporter.quantized_path)
+
+
+def test_manifest_describes_classifier(exporter, samples):
+    exporter.export(str(samples), tolerance=1.0, min_agreement=0.0)
+
+    with open(exporter.manifest_path) as f:
+        manifest = json.load(f)
+
+    assert manifest['class_names'] == CLASS_NAMES
+    assert manifest['category_mapping'] == CATEGORY_MAPPING
+    assert manifest['preprocessing']['resize'] == {
+        'height': exporter.classifier.input_size,
+        'width': exporter.classifier.input_size,
+        'interpolation': 'bilinear',
+        'antialias': True
+    }
+    assert manifest['preprocessing']['mean'] == [0.485, 0.456, 0.406]
+    assert manifest['preprocessing']['std'] == [0.229, 0.224, 0.225]
+    assert manifest['model_file'] == 'compact_waste_classifier.int8.onnx'
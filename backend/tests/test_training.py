@@ -0,0 +1,99 @@
+"""
+Tests for the offline distillation pipeline
+Covers the loss, the streaming loader and the multi-resolution transform;
+no pretrained weights are downloaded
+"""
+
+import pytest
+
+torch = pytest.importorskip('torch')
+pytest.importorskip('torchvision')
+import torch.nn.functional as F
+import torchvision.transforms as transforms
+from PIL import Image
+from torch.utils.data import DataLoader
+
+from training import MultiResolutionTransform, StreamingImageFolder, distillation_loss
+
+CLASS_NAMES = ['plastic', 'paper', 'glass']
+
+
+def test_distillation_loss_is_cross_entropy_without_soft_term():
+    torch.manual_seed(0)
+    student = torch.randn(8, 6)
+    teacher = torch.randn(8, 6)
+    labels = torch.randint(0, 6, (8,))
+
+    loss = distillation_loss(student, teacher, labels, alpha=0.0)
+
+    assert torch.allclose(loss, F.cross_entropy(student, labels))
+
+
+def test_distillation_loss_soft_term_vanishes_for_matching_logits():
+    torch.manual_seed(0)
+    logits = torch.randn(8, 6)
+    labels = torch.randint(0, 6, (8,))
+
+    loss = distillation_loss(logits, logits.clone(), labels, temperature=4.0, alpha=1.0)
+
+    assert loss.item() == pytest.approx(0.0, abs=1e-6)
+
+
+@pytest.fixture
+def image_folder(tmp_path):
+    """Write 30 images whose red channel encodes a unique id"""
+    for i in range(30):
+        class_dir = tmp_path / CLASS_NAMES[i % len(CLASS_NAMES)]
+        class_dir.mkdir(exist_ok=True)
+        Image.new('RGB', (8, 8), (i, 0, 0)).save(class_dir / f'{i:02d}.png')
+    return tmp_path
+
+
+def _ids(loader):
+    return [int(image[0, 0, 0]) for image, _ in loader]
+
+
+@pytest.mark.parametrize('shuffle', [False, True])
+def test_streaming_folder_yields_each_file_once_per_epoch(image_folder, shuffle):
+    dataset = StreamingImageFolder(
+        str(image_folder),
+        CLASS_NAMES,
+        transforms.PILToTensor(),
+        shuffle=shuffle,
+        shuffle_buffer=4
+    )
+    loader = DataLoader(dataset, batch_size=None, num_workers=3)
+
+    for epoch in range(2):
+        dataset.set_epoch(epoch)
+        ids = _ids(loader)
+        assert sorted(ids) == list(range(30))
+
+
+def test_streaming_folder_labels_follow_class_names(image_folder):
+    dataset = StreamingImageFolder(str(image_folder), CLASS_NAMES, transforms.PILToTensor())
+
+    for image, label in dataset:
+        assert label == int(image[0, 0, 0]) % len(CLASS_NAMES)
+
+
+def test_multi_resolution_transform_shapes_and_shared_flip():
+    # Left half bright, right half dark, so a flip is visible in every view
+    image = Image.new('RGB', (300, 300), (0, 0, 0))
+    image.paste((255, 255, 255), (0, 0, 150, 300))
+    transform = MultiResolutionTransform((224, 160), train=True)
+    torch.manual_seed(0)
+
+    flips = set()
+    for _ in range(20):
+        large, small = transform(image)
+        assert large.shape == (3, 224, 224)
+        assert small.shape == (3, 160, 160)
+
+        large_flipped = large[0, :, 0].mean() < large[0, :, -1].mean()
+        small_flipped = small[0, :, 0].mean() < small[0, :, -1].mean()
+        assert large_flipped == small_flipped
+        flips.add(bool(large_flipped))
+
+    # Seeded, so both flip outcomes are exercised deterministically
+    assert flips == {True, False}
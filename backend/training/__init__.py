@@ -0,0 +1,8 @@
+"""
+Offline training module
+"""
+
+from .data import MultiResolutionTransform, StreamingImageFolder, build_loader
+from .distillation import DistillationTrainer, distillation_loss
+
+__all__ = ['MultiResolutionTransform', 'StreamingImageFolder', 'build_loader', 'DistillationTrainer', 'distillation_loss']
@@ -0,0 +1,193 @@
+"""
+Streaming image loader for offline training
+Reads labelled waste images from local folders laid out as <root>/<class_name>/*.jpg
+"""
+
+import os
+import random
+import logging
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import torch
+import torchvision.transforms as transforms
+from torch.utils.data import DataLoader, IterableDataset, get_worker_info
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+# Same normalization as WasteClassifier.transform
+IMAGENET_MEAN = [0.485, 0.456, 0.406]
+IMAGENET_STD = [0.229, 0.224, 0.225]
+
+
+def build_transform(input_size: int, train: bool = False) -> transforms.Compose:
+    """Build preprocessing pipeline matching the serving transform"""
+    steps = [transforms.Resize((input_size, input_size))]
+    if train:
+        steps.append(transforms.RandomHorizontalFlip())
+    steps += [
+        transforms.ToTensor(),
+        transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD)
+    ]
+    return transforms.Compose(steps)
+
+
+class MultiResolutionTransform:
+    """
+    Produce one normalised tensor per resolution from the same source image
+    Each view is resized straight from the decoded image, exactly as
+    WasteClassifier.transform does at serving time
+    """
+
+    def __init__(self, input_sizes: Sequence[int], train: bool = False):
+        """
+        Initialize transform
+
+        Args:
+            input_sizes: Resolutions to emit, in order
+            train: Apply one random horizontal flip shared by all views
+        """
+        self.flip = transforms.RandomHorizontalFlip() if train else None
+        self.views = [build_transform(size) for size in input_sizes]
+
+    def __call__(self, image: Image.Image) -> Tuple[torch.Tensor, ...]:
+        if self.flip:
+            image = self.flip(image)
+        return tuple(view(image) for view in self.views)
+
+
+class StreamingImageFolder(IterableDataset):
+    """
+    Iterable dataset that streams images from disk instead of indexing them up front
+    Files are sharded across DataLoader workers so each image is read exactly once per epoch
+    """
+
+    def __init__(self, root: str, class_names: List[str], transform: Callable,
+                 shuffle: bool = False, shuffle_buffer: int = 256, seed: int = 0):
+        """
+        Initialize streaming dataset
+
+        Args:
+            root: Directory containing one sub-folder per class
+            class_names: Ordered class list; folder names must match these
+            transform: Preprocessing applied to every image
+            shuffle: Shuffle file order and use a bounded shuffle buffer
+            shuffle_buffer: Number of decoded samples held for shuffling
+            seed: Base seed for shuffling, combined with the epoch
+        """
+        super().__init__()
+        self.root = root
+        self.class_names = class_names
+        self.transform = transform
+        self.shuffle = shuffle
+        self.shuffle_buffer = shuffle_buffer
+        self.seed = seed
+        self.epoch = 0
+
+        missing = [name for name in class_names
+                   if not os.path.isdir(os.path.join(root, name))]
+        if len(missing) == len(class_names):
+            raise ValueError(f"No class folders found under {root}")
+        if missing:
+            logger.warning(f"Class folders missing under {root}: {missing}")
+
+    def set_epoch(self, epoch: int):
+        """Change shuffling order between epochs"""
+        self.epoch = epoch
+
+    def _iter_files(self) -> Iterator[Tuple[str, int]]:
+        """Walk class folders lazily, yielding (path, label) pairs"""
+        for label, name in enumerate(self.class_names):
+            class_dir = os.path.join(self.root, name)
+            if not os.path.isdir(class_dir):
+                continue
+            with os.scandir(class_dir) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                        yield entry.path, label
+
+    def _iter_shard(self) -> Iterator[Tuple[str, int]]:
+        """Yield only the files assigned to the current worker"""
+        worker = get_worker_info()
+        worker_id = worker.id if worker else 0
+        num_workers = worker.num_workers if worker else 1
+
+        files = self._iter_files()
+        if self.shuffle:
+            files = list(files)
+            random.Random(self.seed + self.epoch).shuffle(files)
+
+        for i, item in enumerate(files):
+            if i % num_workers == worker_id:
+                yield item
+
+    def _load(self, path: str, label: int) -> Optional[Tuple[torch.Tensor, int]]:
+        try:
+            with Image.open(path) as image:
+                if image.mode != 'RGB':
+                    image = image.convert('RGB')
+                return self.transform(image), label
+        except Exception as e:
+            logger.warning(f"Skipping unreadable image {path}: {e}")
+            return None
+
+    def __iter__(self) -> Iterator[Tuple[torch.Tensor, int]]:
+        samples = (self._load(path, label) for path, label in self._iter_shard())
+        samples = (sample for sample in samples if sample is not None)
+
+        if not self.shuffle:
+            yield from samples
+            return
+
+        worker = get_worker_info()
+        rng = random.Random(self.seed + self.epoch + (worker.id if worker else 0))
+        buffer = []
+        for sample in samples:
+            if len(buffer) < self.shuffle_buffer:
+                buffer.append(sample)
+                continue
+            idx = rng.randrange(len(buffer))
+            yield buffer[idx]
+            buffer[idx] = sample
+        rng.shuffle(buffer)
+        yield from buffer
+
+
+def build_loader(root: str, class_names: List[str], input_size: Union[int, Sequence[int]],
+                 batch_size: int = 32, num_workers: int = 4,
+                 train: bool = False) -> DataLoader:
+    """
+    Build a multi-process streaming DataLoader over a local image folder
+
+    Args:
+        root: Directory containing one sub-folder per class
+        class_names: Ordered class list
+        input_size: Resolution images are resized to; a sequence of sizes
+            yields a tuple with one tensor per size for every sample
+        batch_size: Samples per batch
+        num_workers: Number of loader processes
+        train: Enable augmentation and shuffling
+
+    Returns:
+        DataLoader yielding (images, labels) batches
+    """
+    if isinstance(input_size, int):
+        transform = build_transform(input_size, train=train)
+    else:
+        transform = MultiResolutionTransform(input_size, train=train)
+
+    dataset = StreamingImageFolder(
+        root,
+        class_names,
+        transform,
+        shuffle=train
+    )
+    return DataLoader(
+        dataset,
+        batch_size=batch_size,
+        num_workers=num_workers,
+        pin_memory=torch.cuda.is_available(),
+        prefetch_factor=2 if num_workers > 0 else None
+    )
@@ -0,0 +1,383 @@
+"""
+Knowledge Distillation for Waste Classification
+Trains a small student (MobileNetV2 or CompactWasteNet) to mimic the ResNet50 teacher
+so the backend can serve a cheaper model on CPU
+
+Usage (from the backend directory):
+    python -m training.distillation --train-dir data/train --val-dir data/val --student compact
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+import time
+from queue import Empty
+from typing import Dict, Optional
+
+import torch
+import torch.nn as nn
+import torch.multiprocessing as mp
+import torch.nn.functional as F
+from torch.utils.data import DataLoader
+
+from waste_classifier import WasteClassifier
+from .data import build_loader
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_STUDENTS = ('mobilenet', 'compact')
+
+# Seconds to wait for the peak memory child process before giving up
+PEAK_MEMORY_TIMEOUT = 300
+
+
+def distillation_loss(student_logits: torch.Tensor, teacher_logits: torch.Tensor,
+                      labels: torch.Tensor, temperature: float = 4.0,
+                      alpha: float = 0.7) -> torch.Tensor:
+    """
+    Combined soft-target and hard-label loss
+
+    Args:
+        student_logits: Raw student outputs
+        teacher_logits: Raw teacher outputs
+        labels: Ground-truth class indices
+        temperature: Softening temperature applied to both distributions
+        alpha: Weight of the soft-target term
+
+    Returns:
+        Scalar loss tensor
+    """
+    soft = F.kl_div(
+        F.log_softmax(student_logits / temperature, dim=1),
+        F.softmax(teacher_logits / temperature, dim=1),
+        reduction='batchmean'
+    ) * (temperature ** 2)
+    hard = F.cross_entropy(student_logits, labels)
+    return alpha * soft + (1 - alpha) * hard
+
+
+class DistillationTrainer:
+    """Distils the ResNet50 teacher into a compact student model"""
+
+    def __init__(self, student_name: str = 'compact', teacher_name: str = 'resnet50',
+                 temperature: float = 4.0, alpha: float = 0.7):
+        """
+        Initialize teacher and student
+
+        Args:
+            student_name: Student architecture ('mobilenet' or 'compact')
+            teacher_name: Teacher architecture, loaded with its trained weights
+            temperature: Distillation temperature
+            alpha: Weight of the soft-target term
+        """
+        if student_name not in SUPPORTED_STUDENTS:
+            raise ValueError(f"Student {student_name} not supported")
+
+        # Both models go through WasteClassifier so weights, heads and
+        # input sizes stay identical to what the API will serve
+        self.teacher = WasteClassifier(model_name=teacher_name)
+        self.student = WasteClassifier(model_name=student_name)
+        self.device = self.student.device
+        self.class_names = self.student.class_names
+        self.temperature = temperature
+        self.alpha = alpha
+
+        if not os.path.exists(f'models/{teacher_name}_waste_classifier.pth'):
+            logger.warning("Teacher has no trained waste weights; student will learn from an untrained head")
+
+        self.teacher.model.eval()
+        for param in self.teacher.model.parameters():
+            param.requires_grad = False
+
+        logger.info(f"Distillation trainer initialized: {teacher_name} -> {student_name}")
+
+    @property
+    def weights_path(self) -> str:
+        return f'models/{self.student.model_name}_waste_classifier.pth'
+
+    def train(self, train_dir: str, epochs: int = 10, batch_size: int = 32,
+              lr: float = 1e-3, num_workers: int = 4) -> Dict:
+        """
+        Run distillation and save student weights in the serving layout
+
+        Args:
+            train_dir: Folder with one sub-folder per class
+            epochs: Number of passes over the training data
+            batch_size: Samples per batch
+            lr: Initial learning rate
+            num_workers: Number of loader processes
+
+        Returns:
+            Dictionary with per-epoch loss history and weights path
+        """
+        # Each image is decoded once and resized separately for teacher and
+        # student, so the student sees the same input it will get when served
+        loader = build_loader(
+            train_dir,
+            self.class_names,
+            (self.teacher.input_size, self.student.input_size),
+            batch_size=batch_size,
+            num_workers=num_workers,
+            train=True
+        )
+        model = self.student.model
+        optimizer = torch.optim.AdamW(model.parameters(), lr=lr, weight_decay=1e-4)
+        scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, T_max=epochs)
+
+        history = []
+        for epoch in range(epochs):
+            loader.dataset.set_epoch(epoch)
+            model.train()
+            total_loss, batches = 0.0, 0
+
+            for (teacher_images, student_images), labels in loader:
+                teacher_images = teacher_images.to(self.device, non_blocking=True)
+                student_images = student_images.to(self.device, non_blocking=True)
+                labels = labels.to(self.device, non_blocking=True)
+
+                with torch.no_grad():
+                    teacher_logits = self.teacher.model(teacher_images)
+
+                student_logits = model(student_images)
+                loss = distillation_loss(
+                    student_logits, teacher_logits, labels,
+                    temperature=self.temperature, alpha=self.alpha
+                )
+
+                optimizer.zero_grad(set_to_none=True)
+                loss.backward()
+                optimizer.step()
+
+                total_loss += loss.item()
+                batches += 1
+
+            scheduler.step()
+            epoch_loss = total_loss / max(batches, 1)
+            history.append(epoch_loss)
+            logger.info(f"Epoch {epoch + 1}/{epochs} - loss: {epoch_loss:.4f}")
+
+        model.eval()
+        os.makedirs(os.path.dirname(self.weights_path), exist_ok=True)
+        torch.save(model.state_dict(), self.weights_path)
+        logger.info(f"Saved student weights to {self.weights_path}")
+
+        return {
+            'loss_history': history,
+            'weights_path': self.weights_path
+        }
+
+    def evaluate(self, val_dir: str, batch_size: int = 32, num_workers: int = 4,
+                 latency_runs: int = 50, device: str = 'cpu') -> Dict:
+        """
+        Compare student and teacher on accuracy, latency and memory
+
+        Args:
+            val_dir: Folder with one sub-folder per class
+            batch_size: Samples per batch for accuracy measurement
+            num_workers: Number of loader processes
+            latency_runs: Single-image forward passes timed per model
+            device: Device to evaluate on; defaults to CPU, which is what the API serves on
+
+        Returns:
+            Report dictionary, also written next to the student weights
+        """
+        device = torch.device(device)
+        report = {
+            'device': str(device),
+            'teacher': self._evaluate_model(self.teacher, val_dir, batch_size, num_workers, latency_runs, device),
+            'student': self._evaluate_model(self.student, val_dir, batch_size, num_workers, latency_runs, device)
+        }
+
+        teacher, student = report['teacher'], report['student']
+        report['comparison'] = {
+            'accuracy_delta': student['accuracy'] - teacher['accuracy'],
+            'speedup': teacher['latency_ms'] / student['latency_ms'] if student['latency_ms'] else None,
+            'memory_ratio': student['parameter_memory_mb'] / teacher['parameter_memory_mb'],
+            'peak_memory_ratio': (student['peak_inference_memory_mb'] / teacher['peak_inference_memory_mb']
+                                  if teacher['peak_inference_memory_mb'] and student['peak_inference_memory_mb']
+                                  else None)
+        }
+
+        report_path = f'models/{self.student.model_name}_distillation_report.json'
+        os.makedirs(os.path.dirname(report_path), exist_ok=True)
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Evaluation report written to {report_path}")
+
+        return report
+
+    def _evaluate_model(self, classifier: WasteClassifier, val_dir: str, batch_size: int,
+                        num_workers: int, latency_runs: int, device: torch.device) -> Dict:
+        model = classifier.model.to(device)
+        model.eval()
+
+        loader = build_loader(
+            val_dir,
+            self.class_names,
+            classifier.input_size,
+            batch_size=batch_size,
+            num_workers=num_workers
+        )
+        correct, total = self._accuracy(model, loader, device)
+
+        result = {
+            'model_name': classifier.model_name,
+            'input_size': classifier.input_size,
+            'accuracy': correct / total if total else 0.0,
+            'samples': total,
+            'latency_ms': self._latency_ms(model, classifier.input_size, latency_runs, device),
+            'peak_inference_memory_mb': self._peak_memory_mb(model, classifier.input_size, device),
+            'parameters': sum(p.numel() for p in model.parameters()),
+            'parameter_memory_mb': self._parameter_memory_mb(model),
+            'serialized_size_mb': self._serialized_size_mb(model)
+        }
+
+        classifier.model.to(self.device)
+        return result
+
+    def _accuracy(self, model: nn.Module, loader: DataLoader, device: torch.device):
+        correct, total = 0, 0
+        with torch.no_grad():
+            for images, labels in loader:
+                images = images.to(device, non_blocking=True)
+                labels = labels.to(device, non_blocking=True)
+                predictions = model(images).argmax(dim=1)
+                correct += (predictions == labels).sum().item()
+                total += labels.numel()
+        return correct, total
+
+    @staticmethod
+    def _latency_ms(model: nn.Module, input_size: int, runs: int, device: torch.device) -> float:
+        """Mean single-image latency, matching how /classify calls the model"""
+        sample = torch.randn(1, 3, input_size, input_size, device=device)
+        with torch.no_grad():
+            for _ in range(5):
+                model(sample)
+            if device.type == 'cuda':
+                torch.cuda.synchronize()
+            start = time.perf_counter()
+            for _ in range(runs):
+                model(sample)
+            if device.type == 'cuda':
+                torch.cuda.synchronize()
+        return (time.perf_counter() - start) * 1000 / max(runs, 1)
+
+    @staticmethod
+    def _peak_memory_mb(model: nn.Module, input_size: int, device: torch.device) -> Optional[float]:
+        """
+        Peak memory of a single-image forward pass, weights included
+
+        On CUDA this is the allocator high-water mark. On CPU the model is
+        loaded and run in a fresh process and the rise in its peak RSS is
+        reported; this needs the Unix resource module and is None elsewhere
+        """
+        if device.type == 'cuda':
+            torch.cuda.synchronize(device)
+            torch.cuda.empty_cache()
+            torch.cuda.reset_peak_memory_stats(device)
+            baseline = torch.cuda.memory_allocated(device)
+            sample = torch.randn(1, 3, input_size, input_size, device=device)
+            with torch.no_grad():
+                model(sample)
+            torch.cuda.synchronize(device)
+            return (torch.cuda.max_memory_allocated(device) - baseline) / (1024 ** 2)
+
+        if resource is None:
+            return None
+
+        buffer = io.BytesIO()
+        torch.save(model, buffer)
+        ctx = mp.get_context('spawn')
+        queue = ctx.Queue()
+        process = ctx.Process(target=_measure_peak_rss, args=(buffer.getvalue(), input_size, queue))
+        process.start()
+        try:
+            result = queue.get(timeout=PEAK_MEMORY_TIMEOUT)
+        except Empty:
+            result = None
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+
+        if result is None or process.exitcode != 0:
+            logger.warning(f"Peak memory measurement failed (exit code {process.exitcode}); reporting None")
+            return None
+        return result
+
+    @staticmethod
+    def _parameter_memory_mb(model: nn.Module) -> float:
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors) / (1024 ** 2)
+
+    @staticmethod
+    def _serialized_size_mb(model: nn.Module) -> float:
+        buffer = io.BytesIO()
+        torch.save(model.state_dict(), buffer)
+        return buffer.tell() / (1024 ** 2)
+
+
+def _max_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return rss / (1024 ** 2) if sys.platform == 'darwin' else rss / 1024
+
+
+def _measure_peak_rss(serialized_model: bytes, input_size: int, queue):
+    """Child-process body for CPU peak memory measurement"""
+    baseline = _max_rss_mb()
+    model = torch.load(io.BytesIO(serialized_model), weights_only=False)
+    model.eval()
+    sample = torch.randn(1, 3, input_size, input_size)
+    with torch.no_grad():
+        model(sample)
+    queue.put(_max_rss_mb() - baseline)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Distil the ResNet50 waste classifier into a smaller student')
+    parser.add_argument('--train-dir', required=True, help='Training images, one folder per class')
+    parser.add_argument('--val-dir', required=True, help='Validation images, one folder per class')
+    parser.add_argument('--student', default='compact', choices=SUPPORTED_STUDENTS)
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--lr', type=float, default=1e-3)
+    parser.add_argument('--temperature', type=float, default=4.0)
+    parser.add_argument('--alpha', type=float, default=0.7)
+    parser.add_argument('--num-workers', type=int, default=4)
+    parser.add_argument('--eval-device', default='cpu', help='Device for the evaluation report (default: cpu)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    trainer = DistillationTrainer(
+        student_name=args.student,
+        temperature=args.temperature,
+        alpha=args.alpha
+    )
+    trainer.train(
+        args.train_dir,
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        lr=args.lr,
+        num_workers=args.num_workers
+    )
+    report = trainer.evaluate(
+        args.val_dir,
+        batch_size=args.batch_size,
+        num_workers=args.num_workers,
+        device=args.eval_device
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
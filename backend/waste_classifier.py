@@ -15,6 +15,91 @@ import os
 
 logger = logging.getLogger(__name__)
 
+MODEL_VERSION = '1.0.0'
+
+# Class mappings, in model output order
+CLASS_NAMES = [
+    'plastic',
+    'paper',
+    'glass',
+    'metal',
+    'organic',
+    'hazardous'
+]
+
+# Category mapping
+CATEGORY_MAPPING = {
+    'plastic': 'recyclable',
+    'paper': 'recyclable',
+    'glass': 'recyclable',
+    'metal': 'recyclable',
+    'organic': 'organic',
+    'hazardous': 'hazardous'
+}
+
+# Input resolution expected by each supported architecture
+MODEL_INPUT_SIZES = {
+    'resnet50': 224,
+    'mobilenet': 224,
+    'compact': 160
+}
+
+
+class CompactWasteNet(nn.Module):
+    """
+    Narrow depthwise-separable network used as a distillation student
+    Designed for low-resolution input (160x160) on CPU-only servers
+    """
+
+    def __init__(self, num_classes: int = 6, width: int = 16):
+        """
+        Initialize compact network
+
+        Args:
+            num_classes: Number of waste categories
+            width: Channel count of the stem; later stages scale from it
+        """
+        super().__init__()
+
+        def conv_bn(in_ch: int, out_ch: int, stride: int) -> nn.Sequential:
+            return nn.Sequential(
+                nn.Conv2d(in_ch, out_ch, 3, stride, 1, bias=False),
+                nn.BatchNorm2d(out_ch),
+                nn.ReLU6(inplace=True)
+            )
+
+        def conv_dw(in_ch: int, out_ch: int, stride: int) -> nn.Sequential:
+            return nn.Sequential(
+                nn.Conv2d(in_ch, in_ch, 3, stride, 1, groups=in_ch, bias=False),
+                nn.BatchNorm2d(in_ch),
+                nn.ReLU6(inplace=True),
+                nn.Conv2d(in_ch, out_ch, 1, 1, 0, bias=False),
+                nn.BatchNorm2d(out_ch),
+                nn.ReLU6(inplace=True)
+            )
+
+        self.features = nn.Sequential(
+            conv_bn(3, width, 2),
+            conv_dw(width, width * 2, 1),
+            conv_dw(width * 2, width * 4, 2),
+            conv_dw(width * 4, width * 4, 1),
+            conv_dw(width * 4, width * 8, 2),
+            conv_dw(width * 8, width * 8, 1),
+            conv_dw(width * 8, width * 16, 2),
+            conv_dw(width * 16, width * 16, 1),
+            conv_dw(width * 16, width * 32, 2)
+        )
+        self.pool = nn.AdaptiveAvgPool2d(1)
+        self.classifier = nn.Sequential(
+            nn.Dropout(0.2),
+            nn.Linear(width * 32, num_classes)
+        )
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        x = self.features(x)
+        x = self.pool(x).flatten(1)
+        return self.classifier(x)
+
 
 class WasteClassifier:
     """
@@ -32,26 +117,12 @@ class WasteClassifier:
         """
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         self.num_classes = num_classes
+        self.model_name = model_name
+        self.input_size = MODEL_INPUT_SIZES.get(model_name, 224)
         
-        # Class mappings
-        self.class_names = [
-            'plastic',
-            'paper',
-            'glass',
-            'metal',
-            'organic',
-            'hazardous'
-        ]
-        
-        # Category mapping
-        self.category_mapping = {
-            'plastic': 'recyclable',
-            'paper': 'recyclable',
-            'glass': 'recyclable',
-            'metal': 'recyclable',
-            'organic': 'organic',
-            'hazardous': 'hazardous'
-        }
+        # Class and category mappings
+        self.class_names = list(CLASS_NAMES)
+        self.category_mapping = dict(CATEGORY_MAPPING)
         
         # Load model
         self.model = self._load_model(model_name)
@@ -59,7 +130,7 @@ class WasteClassifier:
         
         # Image preprocessing
         self.transform = transforms.Compose([
-            transforms.Resize((224, 224)),
+            transforms.Resize((self.input_size, self.input_size)),
             transforms.ToTensor(),
             transforms.Normalize(
                 mean=[0.485, 0.456, 0.406],
@@ -92,6 +163,10 @@ class WasteClassifier:
                     model = models.mobilenet_v2(weights=None)
                 
                 model.classifier[1] = nn.Linear(1280, self.num_classes)
+            
+            elif model_name == 'compact':
+                # Distilled student; only useful once trained weights exist
+                model = CompactWasteNet(num_classes=self.num_classes)
             else:
                 raise ValueError(f"Model {model_name} not supported")
             
@@ -155,7 +230,7 @@ class WasteClassifier:
                 'waste_type': waste_type,
                 'confidence': conf_score,
                 'top_predictions': top_predictions,
-                'model_version': '1.0.0'
+                'model_version': MODEL_VERSION
             }
         
         except Exception as e: